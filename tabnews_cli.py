@@ -1,91 +1,252 @@
-import requests
-import json
+import httpx
+import hashlib
+import orjson
 import os
+import time
 from dotenv import load_dotenv
-from rich.console import Console
+from rich.console import Console, Group
 from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.prompt import Prompt
-from rich.table import Table
+from rich.segment import Segment
+from rich.text import Text
 from prompt_toolkit import Application
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.layout import Layout, HSplit
-from prompt_toolkit.widgets import TextArea
 from prompt_toolkit.styles import Style
 from prompt_toolkit.layout.containers import Window
 from prompt_toolkit.layout.controls import FormattedTextControl, UIContent, UIControl
 from prompt_toolkit.formatted_text import FormattedText
 import asyncio
+from functools import lru_cache
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import List, Dict, Any
 
 console = Console()
 BASE_URL = "https://www.tabnews.com.br/api/v1"
+PAGE_CACHE_SIZE = 8
+PAGE_CACHE_TTL = 60
+RENDER_CACHE_SIZE = 64
+REQUEST_TIMEOUT = httpx.Timeout(10.0, connect=3.0)
+RETRY_STATUSES = (502, 503, 504)
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.2
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "tabnews")
+CACHE_MAX_FILES = 500
+CACHE_MAX_AGE = 7 * 24 * 60 * 60
+
+@lru_cache(maxsize=512)
+def rich_style_to_pt(style) -> str:
+    """Translate a rich Style into a prompt_toolkit style string."""
+    if style is None:
+        return ""
+    parts = []
+    if style.color is not None and not style.color.is_default:
+        parts.append(style.color.get_truecolor().hex)
+    if style.bgcolor is not None and not style.bgcolor.is_default:
+        parts.append(f"bg:{style.bgcolor.get_truecolor(foreground=False).hex}")
+    for attr in ("bold", "italic", "underline", "reverse", "strike", "blink"):
+        if getattr(style, attr):
+            parts.append(attr)
+    return " ".join(parts)
+
+class SegmentLines:
+    """Renderable yielding pre-built lines of Segments without any layout work."""
+
+    def __init__(self, lines: List[List[Segment]]):
+        self.lines = lines
+
+    def __rich_console__(self, console, options):
+        for line in self.lines:
+            yield from line
+            yield Segment.line()
 
 class RichControl(UIControl):
     def __init__(self, get_renderable):
         self.get_renderable = get_renderable
+        self._content = None
+        self._size = None
+        self._console = None
+
+    def invalidate(self):
+        self._content = None
 
     def create_content(self, width: int, height: int) -> UIContent:
-        renderable = self.get_renderable()
-        console = Console(width=width, height=height)
-        segments = list(console.render(renderable))
+        if self._content is not None and self._size == (width, height):
+            return self._content
+        renderable = self.get_renderable(width, height)
+        console = self._console
+        if console is None or console.size != (width, height):
+            # Only the current window size is ever live, so keep a single Console;
+            # force_terminal skips the TTY probe Console() does on construction
+            console = Console(width=width, height=height, force_terminal=True, color_system="truecolor")
+            self._console = console
+        # render_lines hands back Segments per line directly, no ANSI round-trip
+        lines = console.render_lines(renderable, pad=False)
+        fragments: Dict[int, FormattedText] = {}
 
         def get_line(i: int) -> FormattedText:
-            return [(s.style.class_names.pop() if s.style.class_names else "", s.text) for s in segments[i]]
-
-        return UIContent(
+            # prompt_toolkit only asks for visible lines; translate each one once
+            line = fragments.get(i)
+            if line is None:
+                line = FormattedText([(rich_style_to_pt(s.style), s.text) for s in lines[i] if not s.control])
+                fragments[i] = line
+            return line
+
+        self._content = UIContent(
             get_line=get_line,
-            line_count=len(segments),
+            line_count=len(lines),
             show_cursor=False,
         )
+        self._size = (width, height)
+        return self._content
 
 class TabNewsAPI:
     def __init__(self):
-        self.session = requests.Session()
+        # A single HTTP/2 connection multiplexes every concurrent request
+        self.session = httpx.Client(
+            base_url=BASE_URL,
+            transport=httpx.HTTPTransport(http2=True, retries=RETRY_TOTAL),
+            timeout=REQUEST_TIMEOUT,
+            headers={"User-Agent": "tabnews-cli/1.0"}
+        )
         self.token = None
         load_dotenv()
         self.token = os.getenv("TABNEWS_TOKEN")
+        try:
+            self._prune_cache()
+        except OSError:
+            pass
+
+    def _json(self, response):
+        # orjson decodes the raw bytes, skipping the text decode of response.json()
+        try:
+            return orjson.loads(response.content)
+        except ValueError:
+            # Gateway error pages and empty 5xx bodies are not JSON
+            if response.is_error:
+                return {"error": f"{response.status_code} {response.reason_phrase}"}
+            raise
+
+    def _get(self, path: str, **kwargs):
+        # The transport already retries failed connects; this covers gateway errors
+        for attempt in range(RETRY_TOTAL + 1):
+            response = self.session.get(path, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt == RETRY_TOTAL:
+                return response
+            time.sleep(RETRY_BACKOFF * 2 ** attempt)
 
     def get_contents(self, page: int = 1, per_page: int = 10, strategy: str = "relevant"):
-        url = f"{BASE_URL}/contents"
         params = {
             "page": page,
             "per_page": per_page,
             "strategy": strategy
         }
-        response = self.session.get(url, params=params)
-        return response.json()
+        try:
+            return self._json(self._get("/contents", params=params))
+        except (httpx.HTTPError, ValueError) as e:
+            return {"error": str(e)}
 
     def get_user_contents(self, username: str, page: int = 1, per_page: int = 10, strategy: str = "relevant"):
-        url = f"{BASE_URL}/contents/{username}"
         params = {
             "page": page,
             "per_page": per_page,
             "strategy": strategy
         }
-        response = self.session.get(url, params=params)
-        return response.json()
+        try:
+            return self._json(self._get(f"/contents/{username}", params=params))
+        except (httpx.HTTPError, ValueError) as e:
+            return {"error": str(e)}
 
     def get_content(self, username: str, slug: str):
-        url = f"{BASE_URL}/contents/{username}/{slug}"
-        response = self.session.get(url)
-        return response.json()
+        try:
+            return self._cached_get(f"/contents/{username}/{slug}")
+        except (httpx.HTTPError, ValueError) as e:
+            return {"error": str(e)}
 
     def get_comments(self, username: str, slug: str):
-        url = f"{BASE_URL}/contents/{username}/{slug}/children"
-        response = self.session.get(url)
-        return response.json()
+        try:
+            return self._cached_get(f"/contents/{username}/{slug}/children")
+        except (httpx.HTTPError, ValueError) as e:
+            return {"error": str(e)}
+
+    def _cached_get(self, path: str):
+        """GET with an on-disk cache revalidated through ETag/Last-Modified."""
+        digest = hashlib.blake2b(path.encode("utf-8"), digest_size=16).hexdigest()
+        cache_path = os.path.join(CACHE_DIR, f"{digest}.json")
+        entry = None
+        try:
+            with open(cache_path, "rb") as f:
+                entry = orjson.loads(f.read())
+        except (OSError, ValueError):
+            pass
+
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self._get(path, headers=headers)
+        if response.status_code == 304 and entry:
+            # Mark the entry as recently used so pruning keeps frequently read posts
+            try:
+                os.utime(cache_path)
+            except OSError:
+                pass
+            return entry["json"]
+
+        data = self._json(response)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status_code == 200 and (etag or last_modified):
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp_path = f"{cache_path}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(orjson.dumps({"etag": etag, "last_modified": last_modified, "json": data}))
+                os.replace(tmp_path, cache_path)
+            except OSError:
+                pass
+        return data
+
+    def _prune_cache(self):
+        """Drop cache entries unused for CACHE_MAX_AGE, then the oldest above CACHE_MAX_FILES.
+
+        Runs once at startup so opening a post never pays for a directory scan.
+        """
+        entries = []
+        now = time.time()
+        with os.scandir(CACHE_DIR) as it:
+            for entry in it:
+                if not entry.name.endswith(".json"):
+                    continue
+                try:
+                    mtime = entry.stat().st_mtime
+                    if now - mtime > CACHE_MAX_AGE:
+                        os.remove(entry.path)
+                    else:
+                        entries.append((mtime, entry.path))
+                except OSError:
+                    pass
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - CACHE_MAX_FILES)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
     def login(self, email: str, password: str):
-        url = f"{BASE_URL}/sessions"
         data = {
             "email": email,
             "password": password
         }
-        response = self.session.post(url, json=data)
-        if response.status_code == 200:
-            self.token = response.json().get("token")
-            return True
+        try:
+            response = self.session.post("/sessions", json=data)
+            if response.status_code == 200:
+                self.token = self._json(response).get("token")
+                return True
+        except (httpx.HTTPError, ValueError):
+            pass
         return False
 
 class TabNewsUI:
@@ -95,14 +256,22 @@ class TabNewsUI:
         self.current_strategy = "relevant"
         self.selected_index = 0
         self.contents = []
+        self._feed_segments: List[List[Segment]] = []
         self.current_content = None
         self.view_mode = "feed"
         self.content_scroll_position = 0
         self.comments = []
+        self.error = None
+        self.loading = False
         self.terminal_width = 80
         self.terminal_height = 24
         self.content_pages = []
         self.current_content_page = 0
+        self._executor = ThreadPoolExecutor(max_workers=4)
+        self._page_cache: Dict[tuple, Future] = {}
+        self._page_fetched_at: Dict[tuple, float] = {}
+        self._render_cache: Dict[tuple, Any] = {}
+        self._dirty = True
         self.setup_ui()
 
     def setup_ui(self):
@@ -110,8 +279,8 @@ class TabNewsUI:
 
         @self.kb.add('up')
         def _(event):
-            if self.view_mode == "feed":
-                self.selected_index = max(0, self.selected_index - 1)
+            if self.view_mode == "feed" and not self.loading:
+                self.select_feed_item(self.selected_index - 1)
             elif self.view_mode == "content":
                 self.content_scroll_position = max(0, self.content_scroll_position - 1)
             self.update_view()
@@ -119,8 +288,8 @@ class TabNewsUI:
 
         @self.kb.add('down')
         def _(event):
-            if self.view_mode == "feed":
-                self.selected_index = min(len(self.contents) - 1, self.selected_index + 1)
+            if self.view_mode == "feed" and not self.loading:
+                self.select_feed_item(self.selected_index + 1)
             elif self.view_mode == "content":
                 self.content_scroll_position += 1
             self.update_view()
@@ -130,8 +299,7 @@ class TabNewsUI:
         def _(event):
             if self.view_mode == "feed" and self.current_page > 1:
                 self.current_page -= 1
-                self.selected_index = 0
-                self.fetch_contents()
+                event.app.create_background_task(self.fetch_contents_async())
             self.update_view()
             event.app.invalidate()
 
@@ -139,24 +307,26 @@ class TabNewsUI:
         def _(event):
             if self.view_mode == "feed":
                 self.current_page += 1
-                self.selected_index = 0
-                self.fetch_contents()
+                event.app.create_background_task(self.fetch_contents_async())
             self.update_view()
             event.app.invalidate()
 
         @self.kb.add('enter')
         def _(event):
-            if self.view_mode == "feed" and self.contents:
-                self.view_mode = "content"
-                self.content_scroll_position = 0
-                self.current_content = self.api.get_content(
-                    self.contents[self.selected_index]["owner_username"],
-                    self.contents[self.selected_index]["slug"]
-                )
-                self.comments = self.api.get_comments(
-                    self.contents[self.selected_index]["owner_username"],
-                    self.contents[self.selected_index]["slug"]
-                )
+            if self.view_mode == "feed" and self.contents and not self.loading:
+                username = self.contents[self.selected_index]["owner_username"]
+                slug = self.contents[self.selected_index]["slug"]
+                # Both requests are in flight at once, multiplexed over one connection
+                content_future = self._executor.submit(self.api.get_content, username, slug)
+                comments_future = self._executor.submit(self.api.get_comments, username, slug)
+                content = content_future.result()
+                comments = comments_future.result()
+                self.error = self._api_error(content)
+                if not self.error:
+                    self.view_mode = "content"
+                    self.content_scroll_position = 0
+                    self.current_content = content
+                    self.comments = comments if isinstance(comments, list) else []
             self.update_view()
             event.app.invalidate()
 
@@ -164,6 +334,8 @@ class TabNewsUI:
         def _(event):
             if self.view_mode in ["content", "comments"]:
                 self.view_mode = "feed"
+                # Reading a post may have outlived the prefetch; refresh it now
+                self._get_page(self.current_page + 1)
             self.update_view()
             event.app.invalidate()
 
@@ -200,13 +372,96 @@ class TabNewsUI:
             layout=self.layout,
             key_bindings=self.kb,
             style=self.style,
-            full_screen=True
+            full_screen=True,
+            before_render=self._before_render
         )
 
-    def fetch_contents(self):
-        self.contents = self.api.get_contents(self.current_page, 10, self.current_strategy)
+    def update_view(self):
+        # Only flag the view; the actual render happens at most once per frame
+        self._dirty = True
+
+    def _before_render(self, app):
+        if self._dirty:
+            self._dirty = False
+            self.rich_control.invalidate()
 
-    def get_renderable(self):
+    def _api_error(self, data):
+        """Return the message of a failed API response, or None."""
+        if isinstance(data, dict) and ("error" in data or "error_id" in data):
+            return data.get("error") or data.get("message") or "Unknown error"
+        return None
+
+    def fetch_contents(self):
+        self._set_contents(self._get_page(self.current_page).result())
+
+    async def fetch_contents_async(self):
+        """Fetch the current page without blocking the key bindings."""
+        page = self.current_page
+        try:
+            future = self._get_page(page)
+            if not future.done():
+                self.loading = True
+                self.update_view()
+                self.app.invalidate()
+            contents = await asyncio.wrap_future(future)
+        except Exception as e:
+            # Anything get_contents() didn't turn into an error dict takes the same path
+            contents = {"error": str(e)}
+        finally:
+            if page == self.current_page:
+                self.loading = False
+        if page != self.current_page:
+            # The user already moved to another page; its own task will refresh
+            return
+        self._set_contents(contents)
+        self.update_view()
+        self.app.invalidate()
+
+    def _set_contents(self, contents):
+        self.error = self._api_error(contents)
+        if self.error:
+            # Don't keep a failed page around; the next visit retries it
+            self._page_cache.pop((self.current_page, self.current_strategy), None)
+            contents = []
+        self.contents = contents
+        # Reset here rather than in the key handlers so the marker never points at
+        # a row of the page being replaced
+        self.selected_index = 0
+        self._feed_segments = [
+            [Segment(" "), Segment("→" if i == self.selected_index else " "), Segment(f" {content['title']}")]
+            for i, content in enumerate(self.contents)
+        ]
+        # Prefetch the next page so the usual "right arrow" is served from cache
+        self._get_page(self.current_page + 1)
+
+    def _get_page(self, page: int) -> Future:
+        key = (page, self.current_strategy)
+        future = self._page_cache.get(key)
+        failed = future is not None and future.done() and (
+            future.exception() is not None or self._api_error(future.result())
+        )
+        if future is None or failed:
+            return self._submit_page(key)
+        if future.done() and time.monotonic() - self._page_fetched_at.get(key, 0.0) > PAGE_CACHE_TTL:
+            # Serve the stale page right away and refresh it for the next visit
+            self._submit_page(key)
+        return future
+
+    def _submit_page(self, key: tuple) -> Future:
+        page, strategy = key
+        future = self._executor.submit(self.api.get_contents, page, 10, strategy)
+        future.add_done_callback(lambda f: self._page_fetched_at.__setitem__(key, time.monotonic()))
+        self._page_cache.pop(key, None)
+        self._page_cache[key] = future
+        while len(self._page_cache) > PAGE_CACHE_SIZE:
+            evicted = next(iter(self._page_cache))
+            del self._page_cache[evicted]
+            self._page_fetched_at.pop(evicted, None)
+        return future
+
+    def get_renderable(self, width: int, height: int):
+        self.terminal_width = width
+        self.terminal_height = height
         if self.view_mode == "feed":
             return self.display_feed()
         elif self.view_mode == "content":
@@ -214,32 +469,74 @@ class TabNewsUI:
         elif self.view_mode == "comments":
             return self.display_comments()
 
+    def select_feed_item(self, index: int):
+        if not self._feed_segments:
+            return
+        index = max(0, min(len(self._feed_segments) - 1, index))
+        if index == self.selected_index:
+            return
+        # Only the two rows whose marker flips are touched
+        self._feed_segments[self.selected_index][1] = Segment(" ")
+        self._feed_segments[index][1] = Segment("→")
+        self.selected_index = index
+
     def display_feed(self):
-        table = Table(show_header=False, box=None, padding=(0, 1))
-        table.add_column()
-        for i, content in enumerate(self.contents):
-            prefix = "→" if i == self.selected_index else " "
-            table.add_row(f"{prefix} {content['title']}")
-        return table
+        if self.loading:
+            return Text(" Loading…", style="italic")
+        if self.error:
+            return Group(Text(f" {self.error}", style="bold red"), SegmentLines(self._feed_segments))
+        return SegmentLines(self._feed_segments)
+
+    def _cached_render(self, key: tuple, build):
+        # Markdown() parses its whole body up front, so avoid redoing it on every redraw
+        renderable = self._render_cache.get(key)
+        if renderable is None:
+            renderable = build()
+            self._render_cache[key] = renderable
+            while len(self._render_cache) > RENDER_CACHE_SIZE:
+                del self._render_cache[next(iter(self._render_cache))]
+        return renderable
 
     def display_content(self):
         if self.current_content:
-            markdown = Markdown(self.current_content["body"])
-            return Panel(markdown, title=self.current_content["title"])
+            # Deferred: rich.markdown pulls in markdown_it and pygments at import
+            from rich.markdown import Markdown
+
+            content = self.current_content
+            width = self.terminal_width
+            # Lay the post out once per width; scrolling then only slices lines
+            lines = self._cached_render(
+                ("content", content["id"], hash(content["body"]), width),
+                lambda: console.render_lines(
+                    Panel(Markdown(content["body"]), title=content["title"]),
+                    console.options.update_width(width)
+                )
+            )
+            max_scroll = max(0, len(lines) - self.terminal_height)
+            self.content_scroll_position = min(self.content_scroll_position, max_scroll)
+            start = self.content_scroll_position
+            return SegmentLines(lines[start:start + self.terminal_height])
         return ""
 
     def display_comments(self):
         if self.comments:
-            renderables = []
-            for comment in self.comments:
-                markdown = Markdown(comment["body"])
-                renderables.append(Panel(markdown, title=comment["owner_username"]))
-            return "\n".join(str(r) for r in renderables)
+            from rich.markdown import Markdown
+
+            # One Markdown pass over every comment instead of one per comment
+            return self._cached_render(
+                ("comments", tuple((c["id"], hash(c["body"])) for c in self.comments)),
+                lambda: Markdown("\n\n---\n\n".join(
+                    f"**@{c['owner_username']}**\n\n{c['body']}" for c in self.comments
+                ))
+            )
         return ""
 
     def run(self):
         self.fetch_contents()
-        self.app.run()
+        try:
+            self.app.run()
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
 
 if __name__ == "__main__":
     ui = TabNewsUI()